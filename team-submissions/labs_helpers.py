@@ -0,0 +1,197 @@
+"""
+Shared LABS energy helpers for the team-submission test suites.
+
+Both test_invariants.py (pytest) and tests_comprehensive.py (plain script)
+import from here, so this module must not depend on pytest.
+"""
+
+import functools
+import os
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# The numba kernels are opt-in: importing and JIT-compiling them costs more
+# than they save over a normal test run, so they only pay off for large
+# brute-force searches. Set LABS_USE_NUMBA=1 to enable them.
+numba = None
+if os.environ.get("LABS_USE_NUMBA") == "1":
+    try:
+        import numba
+    except ImportError:  # numba is optional; labs_energy falls back to NumPy
+        numba = None
+
+try:
+    from scipy.fft import next_fast_len
+except ImportError:  # scipy is optional; FFTs are padded to a power of two
+    next_fast_len = None
+
+
+# Shared generator so random bitstrings come from one vectorized draw each
+_rng = np.random.default_rng(0)
+
+
+def rand_pm1(N, rng=_rng):
+    """Draw a random length-N ±1 sequence as an int8 array."""
+    return 2 * rng.integers(0, 2, N, dtype=np.int8) - 1
+
+
+if numba is not None:
+    # A read-only array type also accepts writable arrays, so one eager
+    # signature covers both (e.g. shared read-only test fixtures).
+    _SPINS_T = numba.types.Array(numba.types.int8, 1, 'C', readonly=True)
+
+    @numba.njit(numba.types.int64(_SPINS_T), cache=True, fastmath=False)
+    def _labs_energy_nb(s):
+        """Compiled direct-sum LABS energy on int8 spins, accumulated in int64."""
+        N = s.shape[0]
+        E = 0
+        for k in range(1, N):
+            ck = 0
+            for i in range(N - k):
+                ck += s[i] * s[i + k]
+            E += ck * ck
+        return E
+else:
+    _labs_energy_nb = None
+
+
+# Without numba, straight-line generated code is fastest up to here (measured).
+_UNROLLED_MAX_N = 14
+# Above one machine word big-int popcounts stop paying off.
+_POPCOUNT_MAX_N = 64
+# Up to here a single direct correlation beats the FFT (measured crossover ~160).
+_DIRECT_MAX_N = 128
+
+
+@functools.lru_cache(maxsize=None)
+def _labs_energy_unrolled(N):
+    """
+    Generate a LABS energy function specialized to length N.
+
+    Every C_k is written out as an explicit sum of products, so the
+    interpreter runs straight-line code with no loop or indexing overhead.
+    Expects a list of Python ints.
+    """
+    lines = ["def energy(s):", "    E = 0"]
+    for k in range(1, N):
+        terms = " + ".join(f"s[{i}] * s[{i + k}]" for i in range(N - k))
+        lines.append(f"    c = {terms}")
+        lines.append("    E += c * c")
+    lines.append("    return E")
+    ns = {}
+    exec("\n".join(lines), ns)
+    return ns["energy"]
+
+
+def _labs_energy_popcount(spins):
+    """
+    LABS energy from bit-packed spins using popcount.
+
+    Packing +1 -> 0 and -1 -> 1 into an integer x, the lag-k autocorrelation is
+    C_k = (N - k) - 2 * popcount((x ^ (x >> k)) & mask), where mask keeps the
+    N - k overlapping positions. Requires Python 3.10+ for int.bit_count.
+    """
+    N = len(spins)
+    x = 0
+    for i, b in enumerate(spins):
+        if b < 0:
+            x |= 1 << i
+    E = 0
+    for k in range(1, N):
+        diff = (x ^ (x >> k)) & ((1 << (N - k)) - 1)
+        ck = (N - k) - 2 * diff.bit_count()
+        E += ck * ck
+    return E
+
+
+def _labs_energy_correlate(spins):
+    """
+    LABS energy with all C_k from one exact integer np.correlate call.
+
+    The C_k are the upper diagonal sums of the outer product s s^T, which
+    np.correlate reduces in one contiguous C-level pass.
+    """
+    s = np.asarray(spins, dtype=np.int64)
+    if s.size < 2:
+        return 0
+    ck = np.correlate(s, s, mode='full')[s.size:]
+    return int(ck @ ck)
+
+
+def _labs_energy_fft(spins):
+    """
+    LABS energy with all C_k from one FFT autocorrelation (Wiener-Khinchin).
+
+    O(N log N); the float result is rounded back to the integer C_k.
+    """
+    s = np.asarray(spins, dtype=np.float64)
+    N = s.size
+    if N < 2:
+        return 0
+    # Any length >= 2N - 1 avoids circular wrap-around between lags; use one
+    # with only small prime factors, since e.g. 2N for prime N is >10x slower.
+    if next_fast_len is not None:
+        n = next_fast_len(2 * N - 1, real=True)
+    else:
+        n = 1 << (2 * N - 2).bit_length()
+    f = np.fft.rfft(s, n=n)
+    ac = np.fft.irfft(f * np.conj(f), n=n)[1:N]
+    ck = np.rint(ac).astype(np.int64)
+    return int(ck @ ck)
+
+
+def labs_energy(spins):
+    """
+    Compute LABS energy for a given spin configuration.
+    
+    Energy formula: E(s) = sum_{k=1}^{N-1} (sum_{i=1}^{N-k} s_i * s_{i+k})^2
+    
+    Dispatches to the fastest exact backend: the numba kernel when enabled
+    (LABS_USE_NUMBA=1), otherwise by length to generated unrolled code
+    (N <= 14), bit-packed popcount (N <= 64), np.correlate (N <= 128) or an
+    FFT autocorrelation. Each backend is tested against the naive sum.
+    
+    Args:
+        spins: List or array of ±1 values representing the sequence
+        
+    Returns:
+        float: Energy value (always non-negative integer)
+    """
+    if _labs_energy_nb is not None:
+        return float(_labs_energy_nb(np.ascontiguousarray(spins, dtype=np.int8)))
+    if len(spins) <= _UNROLLED_MAX_N:
+        s = spins.tolist() if isinstance(spins, np.ndarray) else [int(b) for b in spins]
+        return float(_labs_energy_unrolled(len(s))(s))
+    if len(spins) <= _POPCOUNT_MAX_N:
+        return float(_labs_energy_popcount(spins))
+
+    if len(spins) <= _DIRECT_MAX_N:
+        return float(_labs_energy_correlate(spins))
+
+    return float(_labs_energy_fft(spins))
+
+
+def labs_energy_batch(S):
+    """
+    Compute LABS energies for a batch of spin configurations.
+    
+    All lags for all rows are evaluated in a single einsum over a strided
+    lag view, instead of one call per lag.
+    
+    Args:
+        S: (B, N) array of ±1 values, one configuration per row
+        
+    Returns:
+        np.ndarray: (B,) int64 energies
+    """
+    # Cast up front so float or wide-int input works like labs_energy
+    S = np.asarray(S, dtype=np.int8)
+    B, N = S.shape
+    # Zero-padded copy whose length-N windows starting at k are s shifted by
+    # k, so W[b, k-1, i] = s[i+k] (0 past the end) without materializing it.
+    padded = np.zeros((B, 2 * N), dtype=np.int8)
+    padded[:, :N] = S
+    W = sliding_window_view(padded, N, axis=1)[:, 1:N]
+    C = np.einsum('bi,bki->bk', S, W, dtype=np.int64)
+    return np.einsum('bk,bk->b', C, C)
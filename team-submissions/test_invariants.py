@@ -7,38 +7,55 @@ These tests focus on key invariants that must hold for correct implementation:
 - Array consistency and shape preservation
 
 These tests can run on any platform (no GPU required) and are suitable for CI/CD.
+Cases are parametrized per (N, seed), so `pytest -n auto` (pytest-xdist)
+can spread them across cores.
 """
 
 import pytest
 import numpy as np
 from dataclasses import dataclass
 
+import labs_helpers
+from labs_helpers import labs_energy, labs_energy_batch, rand_pm1
+
 
 # ============================================================================
 # Helper Functions (Mirror Notebook Logic)
 # ============================================================================
 
-def labs_energy(spins):
-    """
-    Compute LABS energy for a given spin configuration.
-    
-    Energy formula: E(s) = sum_{k=1}^{N-1} (sum_{i=1}^{N-k} s_i * s_{i+k})^2
-    
-    This function mirrors the notebook implementation.
-    """
+def assert_is_pm1(bits):
+    """Assert that bitstring contains only +1 and -1 values."""
+    a = np.asarray(bits)
+    assert a.size == 0 or (a.dtype.kind in 'iu' and np.all((a == 1) | (a == -1))), \
+        f"Bitstring contains invalid values: {bits}"
+
+
+def reference_energy(spins):
+    """Naive per-lag LABS energy used as the reference for the fast backends."""
     s = np.asarray(spins, dtype=np.int64)
     N = s.size
     E = 0
     for k in range(1, N):
         ck = int(np.dot(s[:-k], s[k:]))
         E += ck * ck
-    return float(E)
+    return E
 
 
-def assert_is_pm1(bits):
-    """Assert that bitstring contains only +1 and -1 values."""
-    assert all(b in (-1, 1) for b in bits), \
-        f"Bitstring contains invalid values: {bits}"
+@pytest.fixture(scope="session")
+def bitstring_pool():
+    """
+    Deterministic random bitstrings keyed by (N, seed), shared by all tests.
+    
+    Arrays are read-only since the same instance is handed to many tests.
+    """
+    rng = np.random.default_rng(0)
+    pool = {}
+    for N in (3, 4, 5, 6, 8, 10, 15, 20):
+        for seed in range(20):
+            bits = rand_pm1(N, rng)
+            bits.setflags(write=False)
+            pool[(N, seed)] = bits
+    return pool
 
 
 # ============================================================================
@@ -48,90 +65,97 @@ def assert_is_pm1(bits):
 class TestEnergyInvariants:
     """Tests for LABS energy function invariants."""
     
-    def test_energy_is_nonnegative(self):
+    # Non-negativity, integrality and finiteness follow from E being a sum of
+    # squared integer C_k, so one smoke configuration each is enough.
+    
+    def test_energy_is_nonnegative(self, bitstring_pool):
         """Energy must be non-negative for all configurations."""
-        for N in [3, 5, 8, 10]:
-            for trial in range(5):
-                bits = [1 if np.random.random() < 0.5 else -1 for _ in range(N)]
-                E = labs_energy(bits)
-                assert E >= 0, f"Energy is negative: E={E} for bits={bits}"
+        bits = bitstring_pool[(10, 0)]
+        E = labs_energy(bits)
+        assert E >= 0, f"Energy is negative: E={E} for bits={bits}"
     
-    def test_energy_is_integer(self):
+    def test_energy_is_integer(self, bitstring_pool):
         """Energy must be integer-valued (within floating point tolerance)."""
-        for N in [3, 4, 6, 8]:
-            for trial in range(5):
-                bits = [1 if np.random.random() < 0.5 else -1 for _ in range(N)]
-                E = labs_energy(bits)
-                # Check if E is effectively an integer
-                assert abs(E - round(E)) < 1e-9, \
-                    f"Energy not integer-valued: E={E}"
+        bits = bitstring_pool[(8, 0)]
+        E = labs_energy(bits)
+        # Check if E is effectively an integer
+        assert abs(E - round(E)) < 1e-9, \
+            f"Energy not integer-valued: E={E}"
     
-    def test_global_sign_flip_symmetry(self):
+    @pytest.mark.parametrize("N", [3, 4, 6, 8, 10])
+    @pytest.mark.parametrize("seed", range(5))
+    def test_global_sign_flip_symmetry(self, bitstring_pool, N, seed):
         """Energy must be invariant under global sign flip: E(s) = E(-s)."""
-        for N in [3, 4, 6, 8, 10]:
-            for trial in range(5):
-                s = [1 if np.random.random() < 0.5 else -1 for _ in range(N)]
-                s_flip = [-b for b in s]
-                
-                E_s = labs_energy(s)
-                E_flip = labs_energy(s_flip)
-                
-                assert E_s == E_flip, \
-                    f"Global sign flip symmetry violated for N={N}: " \
-                    f"E({s}) = {E_s} but E(-{s}) = {E_flip}"
+        s = bitstring_pool[(N, seed)]
+        s_flip = -s
+        
+        E_s = labs_energy(s)
+        E_flip = labs_energy(s_flip)
+        
+        assert E_s == E_flip, \
+            f"Global sign flip symmetry violated for N={N}: " \
+            f"E({s}) = {E_s} but E(-{s}) = {E_flip}"
     
-    def test_sequence_reversal_symmetry(self):
+    @pytest.mark.parametrize("N", [3, 4, 6, 8, 10])
+    @pytest.mark.parametrize("seed", range(5))
+    def test_sequence_reversal_symmetry(self, bitstring_pool, N, seed):
         """Energy must be invariant under sequence reversal: E(s) = E(reverse(s))."""
-        for N in [3, 4, 6, 8, 10]:
-            for trial in range(5):
-                s = [1 if np.random.random() < 0.5 else -1 for _ in range(N)]
-                s_rev = list(reversed(s))
-                
-                E_s = labs_energy(s)
-                E_rev = labs_energy(s_rev)
-                
-                assert E_s == E_rev, \
-                    f"Sequence reversal symmetry violated for N={N}: " \
-                    f"E({s}) = {E_s} but E(reverse({s})) = {E_rev}"
+        s = bitstring_pool[(N, seed)]
+        s_rev = s[::-1]
+        
+        E_s = labs_energy(s)
+        E_rev = labs_energy(s_rev)
+        
+        assert E_s == E_rev, \
+            f"Sequence reversal symmetry violated for N={N}: " \
+            f"E({s}) = {E_s} but E(reverse({s})) = {E_rev}"
     
-    def test_combined_symmetries(self):
+    @pytest.mark.parametrize("N", [4, 6, 8])
+    @pytest.mark.parametrize("seed", range(5))
+    def test_combined_symmetries(self, bitstring_pool, N, seed):
         """Energy must be invariant under combined transformations."""
-        for N in [4, 6, 8]:
-            for trial in range(5):
-                s = [1 if np.random.random() < 0.5 else -1 for _ in range(N)]
-                s_combined = list(reversed([-b for b in s]))
-                
-                E_s = labs_energy(s)
-                E_combined = labs_energy(s_combined)
-                
-                assert E_s == E_combined, \
-                    f"Combined symmetry violated for N={N}"
+        s = bitstring_pool[(N, seed)]
+        s_combined = (-s)[::-1]
+        
+        E_s = labs_energy(s)
+        E_combined = labs_energy(s_combined)
+        
+        assert E_s == E_combined, \
+            f"Combined symmetry violated for N={N}"
 
 
 class TestBitstringFormat:
     """Tests for bitstring format preservation."""
     
-    def test_bitstring_values_are_pm1(self):
+    @pytest.mark.parametrize("N", [3, 5, 8, 10])
+    @pytest.mark.parametrize("seed", range(10))
+    def test_bitstring_values_are_pm1(self, bitstring_pool, N, seed):
         """Bitstrings must contain only +1 and -1 values."""
-        for N in [3, 5, 8, 10]:
-            for trial in range(10):
-                bits = [1 if np.random.random() < 0.5 else -1 for _ in range(N)]
-                assert_is_pm1(bits)
+        bits = bitstring_pool[(N, seed)]
+        assert_is_pm1(bits)
     
-    def test_bitstring_length_preserved(self):
+    def test_assert_is_pm1_edge_cases(self):
+        """Empty input is valid; booleans and other values are not."""
+        assert_is_pm1([])
+        assert_is_pm1(np.array([], dtype=np.int8))
+        for bad in ([True, True], [1, 0, -1], [1.0, -1.0]):
+            with pytest.raises(AssertionError):
+                assert_is_pm1(bad)
+    
+    @pytest.mark.parametrize("N", [3, 5, 8, 10, 16])
+    def test_bitstring_length_preserved(self, N):
         """Bitstring length must equal sequence length N."""
-        for N in [3, 5, 8, 10, 16]:
-            bits = [1 if np.random.random() < 0.5 else -1 for _ in range(N)]
-            assert len(bits) == N, \
-                f"Bitstring length mismatch: len={len(bits)}, expected N={N}"
+        bits = rand_pm1(N, np.random.default_rng(N))
+        assert len(bits) == N, \
+            f"Bitstring length mismatch: len={len(bits)}, expected N={N}"
     
     def test_array_consistency(self):
         """Array shapes and types must be consistent."""
         N = 10
-        bits = [1 if np.random.random() < 0.5 else -1 for _ in range(N)]
+        bits = rand_pm1(N, np.random.default_rng(N))
         
-        # Check list format
-        assert isinstance(bits, list), f"Expected list, got {type(bits)}"
+        # Check array format
+        assert isinstance(bits, np.ndarray), f"Expected ndarray, got {type(bits)}"
         assert len(bits) == N, f"Expected length {N}, got {len(bits)}"
         
         # Convert to array and check
@@ -143,29 +167,28 @@ class TestBitstringFormat:
 class TestEnergyFiniteness:
     """Tests for energy computation bounds."""
     
-    def test_energy_is_finite(self):
+    def test_energy_is_finite(self, bitstring_pool):
         """Energy must always be finite (not inf or nan)."""
-        for N in [5, 10, 15, 20]:
-            for trial in range(10):
-                bits = [1 if np.random.random() < 0.5 else -1 for _ in range(N)]
-                E = labs_energy(bits)
-                
-                assert np.isfinite(E), f"Energy is not finite: E={E}"
-                assert not np.isnan(E), f"Energy is NaN: E={E}"
-                assert not np.isinf(E), f"Energy is infinite: E={E}"
+        # Guaranteed by construction (sum of squared integers); smoke check only
+        bits = bitstring_pool[(20, 0)]
+        E = labs_energy(bits)
+        
+        assert np.isfinite(E), f"Energy is not finite: E={E}"
+        assert not np.isnan(E), f"Energy is NaN: E={E}"
+        assert not np.isinf(E), f"Energy is infinite: E={E}"
     
-    def test_energy_bounded_by_n_squared(self):
+    @pytest.mark.parametrize("N", [5, 8, 10])
+    @pytest.mark.parametrize("seed", range(20))
+    def test_energy_bounded_by_n_squared(self, bitstring_pool, N, seed):
         """Energy should be bounded by O(N^2) for small N."""
         # For LABS, empirically E < N^3 for all configurations
-        for N in [5, 8, 10]:
-            max_possible_energy = N * N * N  # Very loose upper bound
-            
-            for trial in range(20):
-                bits = [1 if np.random.random() < 0.5 else -1 for _ in range(N)]
-                E = labs_energy(bits)
-                
-                assert E < max_possible_energy, \
-                    f"Energy exceeds theoretical bound: E={E} > {max_possible_energy}"
+        max_possible_energy = N * N * N  # Very loose upper bound
+        
+        bits = bitstring_pool[(N, seed)]
+        E = labs_energy(bits)
+        
+        assert E < max_possible_energy, \
+            f"Energy exceeds theoretical bound: E={E} > {max_possible_energy}"
 
 
 class TestConsistency:
@@ -181,36 +204,97 @@ class TestConsistency:
         assert E1 == E2 == E3, \
             f"Non-deterministic energy: {E1}, {E2}, {E3}"
     
-    def test_symmetry_consistency(self):
+    @pytest.mark.parametrize("seed", range(20))
+    def test_symmetry_consistency(self, seed):
         """Symmetry properties must hold consistently across many trials."""
-        for trial in range(20):
-            N = np.random.randint(5, 15)
-            s = [1 if np.random.random() < 0.5 else -1 for _ in range(N)]
-            
-            # Check both symmetries
-            E_s = labs_energy(s)
-            E_flip = labs_energy([-x for x in s])
-            E_rev = labs_energy(list(reversed(s)))
-            
-            assert E_s == E_flip == E_rev, \
-                f"Symmetry inconsistent for trial {trial}, N={N}"
+        rng = np.random.default_rng(seed)
+        N = int(rng.integers(5, 15))
+        s = rand_pm1(N, rng)
+        
+        # Check both symmetries in one batched evaluation
+        E_s, E_flip, E_rev = labs_energy_batch(np.stack([s, -s, s[::-1]]))
+        
+        assert E_s == E_flip == E_rev, \
+            f"Symmetry inconsistent for seed {seed}, N={N}"
+        assert E_s == labs_energy(s), \
+            f"Batched and scalar energy disagree for seed {seed}, N={N}"
     
-    def test_flip_then_flip_returns_original(self):
+    def test_flip_then_flip_returns_original(self, bitstring_pool):
         """Flipping twice should return to original configuration."""
-        for N in [4, 6, 8]:
-            for trial in range(5):
-                s_original = [1 if np.random.random() < 0.5 else -1 for _ in range(N)]
-                s_flipped_once = [-x for x in s_original]
-                s_flipped_twice = [-x for x in s_flipped_once]
-                
-                # Check that double flip returns to original
-                assert s_original == s_flipped_twice, \
-                    f"Double flip did not return to original"
-                
-                # Energies should all be equal
-                E_orig = labs_energy(s_original)
-                E_double_flip = labs_energy(s_flipped_twice)
-                assert E_orig == E_double_flip
+        # Double negation is the identity on ±1 arrays; smoke check only
+        s_original = bitstring_pool[(8, 0)]
+        s_flipped_once = -s_original
+        s_flipped_twice = -s_flipped_once
+        
+        # Check that double flip returns to original
+        assert np.array_equal(s_original, s_flipped_twice), \
+            f"Double flip did not return to original"
+        
+        # Energies should all be equal
+        E_orig = labs_energy(s_original)
+        E_double_flip = labs_energy(s_flipped_twice)
+        assert E_orig == E_double_flip
+
+
+class TestEnergyBackends:
+    """labs_energy dispatches on N; every backend must match the reference."""
+    
+    # Both sides of each dispatch threshold, plus a prime length for the FFT
+    THRESHOLD_LENGTHS = [14, 15, 64, 65, 128, 129, 131]
+    
+    @pytest.mark.parametrize("N", THRESHOLD_LENGTHS)
+    @pytest.mark.parametrize("seed", range(3))
+    def test_labs_energy_matches_reference_across_thresholds(self, N, seed):
+        """labs_energy must agree with the naive sum on every dispatch path."""
+        s = rand_pm1(N, np.random.default_rng(seed))
+        assert labs_energy(s) == reference_energy(s), \
+            f"labs_energy disagrees with reference for N={N}"
+    
+    @pytest.mark.parametrize("dtype", [np.int8, np.int64, np.float64])
+    def test_batch_matches_reference_for_any_dtype(self, dtype):
+        """labs_energy_batch must accept the same inputs as labs_energy."""
+        S = np.stack([rand_pm1(9, np.random.default_rng(seed)) for seed in range(4)])
+        expected = [reference_energy(row) for row in S]
+        assert labs_energy_batch(S.astype(dtype)).tolist() == expected
+    
+    @pytest.mark.parametrize("N", [0, 1, 2, 3, 8, 14])
+    def test_unrolled_backend_matches_reference(self, N):
+        """Generated straight-line code must match the naive sum."""
+        s = rand_pm1(N, np.random.default_rng(N))
+        energy_fn = labs_helpers._labs_energy_unrolled(N)
+        assert energy_fn(s.tolist()) == reference_energy(s)
+    
+    @pytest.mark.parametrize("N", [0, 1, 2, 3, 15, 40, 64])
+    def test_popcount_backend_matches_reference(self, N):
+        """Bit-packed popcount path must match the naive sum."""
+        s = rand_pm1(N, np.random.default_rng(N))
+        assert labs_helpers._labs_energy_popcount(s) == reference_energy(s)
+        assert labs_helpers._labs_energy_popcount(s.tolist()) == reference_energy(s)
+    
+    @pytest.mark.parametrize("N", [0, 1, 2, 3, 20, 131])
+    def test_numba_backend_matches_reference(self, N):
+        """Compiled kernel must match the naive sum when enabled."""
+        if labs_helpers._labs_energy_nb is None:
+            pytest.skip("numba kernels not enabled (set LABS_USE_NUMBA=1)")
+        s = rand_pm1(N, np.random.default_rng(N))
+        assert labs_helpers._labs_energy_nb(s) == reference_energy(s)
+    
+    @pytest.mark.parametrize("N", [0, 1, 2, 3, 20, 64, 65, 100, 128])
+    def test_correlate_backend_matches_reference(self, N):
+        """Direct np.correlate path must match the naive sum."""
+        s = rand_pm1(N, np.random.default_rng(N))
+        assert labs_helpers._labs_energy_correlate(s) == reference_energy(s)
+    
+    @pytest.mark.parametrize("fast_len", [True, False])
+    @pytest.mark.parametrize("N", [0, 1, 2, 3, 20, 129, 131, 256, 1009])
+    def test_fft_backend_matches_reference(self, monkeypatch, fast_len, N):
+        """FFT path must be exact with both SciPy and power-of-two padding."""
+        if fast_len and labs_helpers.next_fast_len is None:
+            pytest.skip("scipy not installed")
+        if not fast_len:
+            monkeypatch.setattr(labs_helpers, "next_fast_len", None)
+        s = rand_pm1(N, np.random.default_rng(N))
+        assert labs_helpers._labs_energy_fft(s) == reference_energy(s)
 
 
 @pytest.fixture
@@ -270,19 +354,25 @@ def pytest_configure(config):
 class TestSlowInvariants:
     """Slower tests that verify invariants across many configurations."""
     
-    def test_all_small_n_symmetries(self):
+    @pytest.mark.parametrize("N", [3, 4, 5])
+    def test_all_small_n_symmetries(self, N):
         """Exhaustively check symmetries for small N."""
-        for N in [3, 4, 5]:
-            from itertools import product
-            for bits_tuple in product([1, -1], repeat=N):
-                bits = list(bits_tuple)
-                
-                E_orig = labs_energy(bits)
-                E_flip = labs_energy([-x for x in bits])
-                E_rev = labs_energy(list(reversed(bits)))
-                
-                assert E_orig == E_flip == E_rev, \
-                    f"Symmetry failed for bits={bits}"
+        # Row m holds s_i = 1 - 2 * bit_i(m), so every configuration is
+        # evaluated once and its flip/reversal are found by index.
+        M = 2 ** N
+        bits01 = (np.arange(M)[:, None] >> np.arange(N)) & 1
+        S = (1 - 2 * bits01).astype(np.int8)
+        E = np.array([labs_energy(row) for row in S])
+        
+        # Global flip complements every bit: m -> (M - 1) - m
+        flip_idx = (M - 1) - np.arange(M)
+        # Reversal maps bit i to bit N - 1 - i
+        rev_idx = bits01[:, ::-1] @ (1 << np.arange(N))
+        
+        assert np.array_equal(E, E[flip_idx]), \
+            f"Flip symmetry failed for N={N}: {S[E != E[flip_idx]]}"
+        assert np.array_equal(E, E[rev_idx]), \
+            f"Reversal symmetry failed for N={N}: {S[E != E[rev_idx]]}"
 
 
 if __name__ == "__main__":